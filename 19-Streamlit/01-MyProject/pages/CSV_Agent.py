@@ -1,18 +1,32 @@
-from typing import List, Union
-from langchain_experimental.agents.agent_toolkits import create_pandas_dataframe_agent
-from langchain_experimental.tools import PythonAstREPLTool
-from langchain_openai import ChatOpenAI
 from utility.logging import LangsmithTracker
 from utility.langchain_print import AgentStreamParser, AgentCallbacks
+from utility.message_store import MessageRole, MessageType, add_message, print_messages
 from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tools import ToolException
 import streamlit as st
+import io
+import os
+import hashlib
+import tempfile
+import uuid
+import time
 import pandas as pd
-import matplotlib.pyplot as plt
+import pyarrow as pa
+
+# matplotlib, langchain_experimental 등 무거운 모듈은 필요한 함수 안에서 import 합니다
 
 # API KEY 로드 및 프로젝트 설정
 load_dotenv()
 LangsmithTracker(project_name="[Project] CSV Agent")
 
+# 캐시 디렉토리 생성
+if not os.path.exists(".cache"):
+    os.mkdir(".cache")
+
+if not os.path.exists(".cache/csv"):
+    os.mkdir(".cache/csv")
+
 # 제목
 st.title("CSV 데이터를 분석 전문 챗봇 📊")
 
@@ -20,65 +34,8 @@ st.title("CSV 데이터를 분석 전문 챗봇 📊")
 if "messages" not in st.session_state:
     st.session_state["messages"] = []
 
-
-class MessageRole:
-    """
-    메세지 역할 클래스
-    """
-
-    USER = "user"
-    ASSISTANT = "assistant"
-
-
-class MessageType:
-    """
-    메세지 유형 클래스
-    """
-
-    TEXT = "text"  # 텍스트 메세지
-    FIGURE = "figure"  # 그림 메세지
-    CODE = "code"  # 코드 메세지
-    DATAFRAME = "dataframe"  # 데이터프레임 메세지
-
-
-# 메시지 관련 함수
-def print_messages():
-    """
-    저장된 메시지를 화면에 출력하는 함수입니다.
-    """
-    for role, content_list in st.session_state["messages"]:
-        with st.chat_message(role):
-            for content in content_list:
-                if isinstance(content, list):
-                    message_type, message_content = content
-                    if message_type == MessageType.TEXT:
-                        st.markdown(message_content)  # 텍스트 메시지 출력
-                    elif message_type == MessageType.FIGURE:
-                        st.pyplot(message_content)  # 그림 메시지 출력
-                    elif message_type == MessageType.CODE:
-                        with st.status("코드 출력", expanded=False):
-                            st.code(
-                                message_content, language="python"
-                            )  # 코드 메시지 출력
-                    elif message_type == MessageType.DATAFRAME:
-                        st.dataframe(message_content)  # 데이터프레임 메시지 출력
-                else:
-                    raise ValueError(f"알 수 없는 콘텐츠 유형: {content}")
-
-
-def add_message(role: MessageRole, content: List[Union[MessageType, str]]):
-    """
-    새로운 메시지를 저장하는 함수입니다.
-
-    Args:
-        role (MessageRole): 메시지 역할 (사용자 또는 어시스턴트)
-        content (List[Union[MessageType, str]]): 메시지 내용
-    """
-    messages = st.session_state["messages"]
-    if messages and messages[-1][0] == role:
-        messages[-1][1].extend([content])  # 같은 역할의 연속된 메시지는 하나로 합칩니다
-    else:
-        messages.append([role, [content]])  # 새로운 역할의 메시지는 새로 추가합니다
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex
 
 
 # 사이드바 설정
@@ -96,7 +53,7 @@ with st.sidebar:
 # 콜백 함수
 def tool_callback(tool) -> None:
     """
-    도구 실행 결과를 처리하는 콜백 함수입니다.
+    도구 호출 정보(실행할 코드)를 출력하는 콜백 함수입니다.
 
     Args:
         tool (dict): 실행된 도구 정보
@@ -106,30 +63,12 @@ def tool_callback(tool) -> None:
             tool_input = tool.get("tool_input", {})
             query = tool_input.get("query")
             if query:
-                df_in_result = None
+                # 코드는 에이전트가 이미 실행하므로 여기서는 출력만 하고,
+                # 실행 결과는 observation_callback에서 처리합니다
                 with st.status("데이터 분석 중...", expanded=True) as status:
                     st.markdown(f"```python\n{query}\n```")
                     add_message(MessageRole.ASSISTANT, [MessageType.CODE, query])
-                    if "df" in st.session_state:
-                        result = st.session_state["python_tool"].invoke(
-                            {"query": query}
-                        )
-                        if isinstance(result, pd.DataFrame):
-                            df_in_result = result
                     status.update(label="코드 출력", state="complete", expanded=False)
-
-                if df_in_result is not None:
-                    st.dataframe(df_in_result)
-                    add_message(
-                        MessageRole.ASSISTANT, [MessageType.DATAFRAME, df_in_result]
-                    )
-
-                if "plt.show" in query:
-                    fig = plt.gcf()
-                    st.pyplot(fig)
-                    add_message(MessageRole.ASSISTANT, [MessageType.FIGURE, fig])
-
-                return result
             else:
                 st.error(
                     "데이터프레임이 정의되지 않았습니다. CSV 파일을 먼저 업로드해주세요."
@@ -146,11 +85,31 @@ def observation_callback(observation) -> None:
     """
     if "observation" in observation:
         obs = observation["observation"]
-        if isinstance(obs, str) and "Error" in obs:
-            st.error(obs)
+        if isinstance(obs, ToolException):
+            st.error(str(obs))
             st.session_state["messages"][-1][
                 1
             ].clear()  # 에러 발생 시 마지막 메시지 삭제
+            return
+
+        if observation.get("tool") != "python_repl_ast":
+            return
+
+        from utility.python_repl import ReplOutput
+
+        # 코드 실행 중 생성된 Figure는 도구가 실행 결과와 함께 반환합니다 (이미 닫힌 상태)
+        figures = []
+        if isinstance(obs, ReplOutput):
+            obs, figures = obs.output, obs.figures
+
+        # 에이전트가 실행한 결과를 그대로 사용합니다 (코드를 다시 실행하지 않음)
+        if isinstance(obs, pd.DataFrame):
+            st.dataframe(obs)
+            add_message(MessageRole.ASSISTANT, [MessageType.DATAFRAME, obs])
+
+        for fig in figures:
+            st.pyplot(fig)
+            add_message(MessageRole.ASSISTANT, [MessageType.FIGURE, fig])
 
 
 def result_callback(result: str) -> None:
@@ -163,6 +122,314 @@ def result_callback(result: str) -> None:
     pass  # 현재는 아무 동작도 하지 않습니다
 
 
+# CSV 로드 관련 설정
+CSV_CHUNK_SIZE = 1_000_000  # 청크 단위로 읽을 행 수
+LARGE_CSV_BYTES = 200 * 1024 * 1024  # 이 크기 이상의 파일은 청크 단위로 읽습니다
+DTYPE_SAMPLE_ROWS = 10_000  # 데이터 타입 추론에 사용할 샘플 행 수
+CSV_CACHE_DIR = "./.cache/csv"  # 변환한 Parquet 파일을 저장하는 디렉토리
+CSV_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # Parquet 캐시 디렉토리의 최대 크기
+TIMESTAMP_DTYPE = "datetime64[ns, UTC]"  # timestamp 인덱스 타입 (DatetimeIndex)
+INT32_MIN, INT32_MAX = -(2**31), 2**31 - 1  # 정수 컬럼을 변환할 최소 타입(int32)의 범위
+CSV_MEMORY_CACHE_MAX_ENTRIES = 4  # 메모리에 보관할 최대 데이터프레임 수
+
+
+def get_parquet_path(df_key: str) -> str:
+    """
+    업로드 파일의 해시값에 해당하는 Parquet 캐시 파일 경로를 반환하는 함수입니다.
+
+    Args:
+        df_key (str): 업로드 파일의 해시값
+
+    Returns:
+        str: Parquet 캐시 파일 경로
+    """
+    return os.path.join(CSV_CACHE_DIR, f"{df_key}.parquet")
+
+
+def touch_parquet_cache(df_key: str) -> None:
+    """
+    Parquet 캐시 파일의 최근 사용 시각을 갱신하는 함수입니다 (LRU 삭제 기준).
+    st.cache_data의 메모리 캐시에서 바로 반환된 경우에도 갱신되도록 load_csv 밖에서 호출합니다.
+
+    Args:
+        df_key (str): 업로드 파일의 해시값
+    """
+    try:
+        os.utime(get_parquet_path(df_key))
+    except FileNotFoundError:
+        pass  # 다른 세션이 이미 삭제한 경우 다음 로드에서 다시 만듭니다
+
+
+def sweep_parquet_cache(keep_path: str = None) -> None:
+    """
+    Parquet 캐시 디렉토리가 최대 크기를 넘으면 오래 사용하지 않은 파일부터 삭제하는 함수입니다.
+
+    Args:
+        keep_path (str, optional): 삭제하지 않을 파일 경로 (방금 저장한 캐시 파일). 기본값은 None
+    """
+    # 다른 세션이 동시에 파일을 삭제할 수 있으므로 사라진 파일은 건너뜁니다
+    entries = []
+    for name in os.listdir(CSV_CACHE_DIR):
+        if not name.endswith(".parquet"):
+            continue  # 작성 중인 임시 파일은 제외합니다
+        path = os.path.join(CSV_CACHE_DIR, name)
+        try:
+            entries.append((os.path.getmtime(path), os.path.getsize(path), path))
+        except FileNotFoundError:
+            continue
+
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_size <= CSV_CACHE_MAX_BYTES:
+            break
+        if path == keep_path:
+            continue  # 방금 저장한 파일은 혼자 최대 크기를 넘더라도 남겨 둡니다
+        total_size -= size
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def write_parquet_cache(dataframe: pd.DataFrame, parquet_path: str) -> None:
+    """
+    데이터프레임을 Parquet 캐시 파일로 저장하는 함수입니다.
+    임시 파일에 먼저 쓴 뒤 교체하므로 중간에 실패해도 불완전한 캐시 파일이 남지 않습니다.
+
+    Args:
+        dataframe (pd.DataFrame): 저장할 데이터프레임
+        parquet_path (str): Parquet 캐시 파일 경로
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=CSV_CACHE_DIR, suffix=".tmp")
+    os.close(fd)
+    try:
+        dataframe.to_parquet(tmp_path)
+        os.replace(tmp_path, parquet_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def infer_csv_dtypes(raw: bytes) -> dict:
+    """
+    CSV 파일의 앞부분만 읽어 컬럼별 데이터 타입을 추론하는 함수입니다.
+    청크 단위로 읽을 때 청크마다 반복되는 타입 추론을 생략하기 위해 사용합니다.
+
+    Args:
+        raw (bytes): 업로드된 CSV 파일 내용
+
+    Returns:
+        dict: 컬럼 이름과 데이터 타입의 딕셔너리 (timestamp 컬럼 제외)
+    """
+    sample = pd.read_csv(
+        io.BytesIO(raw), sep=";", nrows=DTYPE_SAMPLE_ROWS, dtype_backend="pyarrow"
+    )
+    # 샘플에서 값이 모두 비어 있는 컬럼(null 타입)은 타입을 알 수 없으므로 제외합니다
+    return {
+        column: dtype
+        for column, dtype in sample.drop(columns=["timestamp"]).dtypes.items()
+        if str(dtype) != "null[pyarrow]"
+    }
+
+
+def unify_chunk_schemas(schemas: list) -> pa.Schema:
+    """
+    청크별 Parquet 스키마를 하나로 통합하는 함수입니다.
+    통합할 수 있는 타입(예: null과 double, int와 double)은 넓은 타입으로 맞추고,
+    통합할 수 없는 컬럼(예: int와 문자열)은 문자열로 읽습니다.
+
+    Args:
+        schemas (list): 청크별 pyarrow 스키마 리스트
+
+    Returns:
+        pa.Schema: 통합된 스키마
+    """
+    fields = []
+    for name in schemas[0].names:
+        column_schemas = [pa.schema([schema.field(name)]) for schema in schemas]
+        try:
+            unified = pa.unify_schemas(column_schemas, promote_options="permissive")
+            fields.append(unified.field(name))
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+
+def read_csv_in_chunks(raw: bytes, dtypes: dict = None) -> pd.DataFrame:
+    """
+    대용량 CSV 파일을 청크 단위로 읽어 하나의 데이터프레임으로 합치는 함수입니다.
+    읽은 청크는 메모리에 모아두지 않고 임시 Parquet 파일로 저장한 뒤 한 번에 다시 읽으므로,
+    청크 목록과 합친 결과를 동시에 메모리에 올리지 않습니다.
+    읽는 동안 진행 상황을 진행 바로 표시합니다.
+
+    Args:
+        raw (bytes): 업로드된 CSV 파일 내용
+        dtypes (dict, optional): 컬럼별 데이터 타입. 기본값은 None (타입 추론)
+
+    Returns:
+        pd.DataFrame: 로드된 데이터프레임
+    """
+    buffer = io.BytesIO(raw)
+    progress = st.progress(0.0, text="CSV 파일을 읽는 중입니다...")
+    # 타입이 맞지 않아 읽기에 실패해도(ValueError) 진행 바는 지웁니다
+    try:
+        with tempfile.TemporaryDirectory(dir=CSV_CACHE_DIR) as chunk_dir:
+            schemas = []
+            # pyarrow 엔진은 chunksize를 지원하지 않으므로 C 엔진으로 읽습니다
+            # (timestamp는 문자열로 읽고 UTC 변환은 load_csv에서 처리합니다)
+            for i, chunk in enumerate(
+                pd.read_csv(
+                    buffer,
+                    sep=";",
+                    chunksize=CSV_CHUNK_SIZE,
+                    dtype={**(dtypes or {}), "timestamp": "string[pyarrow]"},
+                    dtype_backend="pyarrow",
+                )
+            ):
+                schemas.append(pa.Schema.from_pandas(chunk, preserve_index=False))
+                chunk.to_parquet(
+                    os.path.join(chunk_dir, f"chunk_{i:05d}.parquet"), index=False
+                )
+                progress.progress(min(1.0, buffer.tell() / len(raw)))
+            # 청크마다 추론된 타입이 다를 수 있으므로(예: 빈 컬럼, int/float) 스키마를 통합해 읽습니다
+            loaded_data = pd.read_parquet(
+                chunk_dir, dtype_backend="pyarrow", schema=unify_chunk_schemas(schemas)
+            )
+    finally:
+        progress.empty()
+    return loaded_data
+
+
+def parse_csv(raw: bytes, dtypes: dict = None) -> pd.DataFrame:
+    """
+    파일 크기에 따라 한 번에 또는 청크 단위로 CSV 파일을 파싱하는 함수입니다.
+    pyarrow 엔진은 타입을 지정해도 전체 파일의 타입을 추론한 뒤 변환하므로,
+    샘플에서 추론한 타입은 청크 단위로 읽는 경우에만 사용합니다.
+
+    Args:
+        raw (bytes): 업로드된 CSV 파일 내용
+        dtypes (dict, optional): 청크 단위로 읽을 때 사용할 컬럼별 데이터 타입. 기본값은 None
+
+    Returns:
+        pd.DataFrame: 파싱된 데이터프레임
+    """
+    if len(raw) >= LARGE_CSV_BYTES:
+        return read_csv_in_chunks(raw, dtypes)
+
+    # timestamp 컬럼은 pyarrow 리더가 직접 파싱하며, UTC 변환은 load_csv에서 처리합니다
+    return pd.read_csv(
+        io.BytesIO(raw),
+        sep=";",
+        engine="pyarrow",  # Arrow의 멀티스레드 CSV 리더 사용
+        dtype_backend="pyarrow",  # Arrow 기반 컬럼으로 메모리 사용량 절감
+    )
+
+
+def downcast_numeric(dataframe: pd.DataFrame) -> pd.DataFrame:
+    """
+    숫자형 컬럼을 값의 범위에 맞는 더 작은 타입으로 변환하는 함수입니다.
+    Arrow 정수 연산은 오버플로 시 에러가 발생하므로(예: int8 컬럼의 `s + s`, `cumsum()`),
+    정수 컬럼은 int8/int16까지 줄이지 않고 int32까지만 변환합니다.
+    변환 전 메모리 사용량은 `dataframe.attrs["memory_usage_before"]`에 기록합니다.
+
+    Args:
+        dataframe (pd.DataFrame): 변환할 데이터프레임
+
+    Returns:
+        pd.DataFrame: 숫자형 컬럼이 변환된 데이터프레임
+    """
+    dataframe.attrs["memory_usage_before"] = int(
+        dataframe.memory_usage(deep=True).sum()
+    )
+    for column in dataframe.columns:
+        if pd.api.types.is_bool_dtype(dataframe[column]):
+            continue
+        if pd.api.types.is_integer_dtype(dataframe[column]):
+            values = dataframe[column]
+            if values.dtype.itemsize <= 4:
+                continue
+            minimum, maximum = values.min(), values.max()
+            if pd.isna(minimum):
+                continue  # 값이 모두 비어 있는 컬럼
+            if INT32_MIN <= minimum and maximum <= INT32_MAX:
+                if isinstance(values.dtype, pd.ArrowDtype):
+                    dataframe[column] = values.astype(pd.ArrowDtype(pa.int32()))
+                else:
+                    dataframe[column] = values.astype("int32")
+        elif pd.api.types.is_float_dtype(dataframe[column]):
+            dataframe[column] = pd.to_numeric(dataframe[column], downcast="float")
+    return dataframe
+
+
+# CSV 로드 함수
+# (메모리 캐시는 최근 파일 몇 개만 보관하고, 나머지는 Parquet 캐시에서 다시 읽습니다)
+@st.cache_data(show_spinner=False, max_entries=CSV_MEMORY_CACHE_MAX_ENTRIES)
+def load_csv(_raw: bytes, df_key: str, dtypes: dict = None) -> pd.DataFrame:
+    """
+    업로드된 CSV 파일을 데이터프레임으로 로드하는 함수입니다.
+    파일 해시값(df_key)을 키로 캐싱하므로 같은 파일은 다시 파싱하지 않습니다.
+    처음 로드한 결과는 Parquet 파일로 저장하여 새 세션이나 프로세스에서도 재사용합니다.
+    st.cache_data는 호출마다 캐시된 값의 새 복사본을 반환하므로 반환된 데이터프레임은 그대로 수정해도 됩니다.
+
+    Args:
+        _raw (bytes): 업로드된 CSV 파일 내용 (캐시 키 계산에서 제외)
+        df_key (str): 업로드 파일의 해시값 (Parquet 캐시 파일 이름)
+        dtypes (dict, optional): 샘플에서 추론한 컬럼별 데이터 타입. 기본값은 None
+
+    Returns:
+        pd.DataFrame: 로드된 데이터프레임
+    """
+    parquet_path = get_parquet_path(df_key)
+    try:
+        loaded_data = pd.read_parquet(parquet_path, dtype_backend="pyarrow")
+    except FileNotFoundError:
+        pass  # 캐시 파일이 없거나 그 사이 삭제된 경우 CSV를 파싱합니다
+    else:
+        # dtype_backend="pyarrow"는 저장된 인덱스도 Arrow 타입으로 읽으므로 새로 읽을 때와 같이 변환합니다
+        loaded_data.index = loaded_data.index.astype(TIMESTAMP_DTYPE)
+        return loaded_data
+
+    try:
+        loaded_data = parse_csv(_raw, dtypes)
+    except ValueError:
+        if dtypes is None:
+            raise
+        # 샘플 이후 행이 추론된 타입과 맞지 않으면 전체 타입 추론으로 다시 읽습니다
+        loaded_data = parse_csv(_raw)
+
+    # timestamp 컬럼을 datetime으로 파싱하고 UTC 시간대로 맞춥니다
+    # (오프셋이 섞여 있거나 빈 값이 있어도 처리할 수 있도록 읽은 뒤 한 번에 변환합니다)
+    loaded_data["timestamp"] = pd.to_datetime(
+        loaded_data["timestamp"], format="ISO8601", utc=True
+    )
+    loaded_data = downcast_numeric(loaded_data)
+
+    # timestamp 컬럼을 정렬된 DatetimeIndex로 설정하여 resample, 구간 조회를 빠르게 합니다
+    # (pyarrow 리더가 파싱한 컬럼은 Arrow 타입으로 남으므로 DatetimeIndex가 되도록 변환하며,
+    #  timestamp가 비어 있는 행(NaT)은 삭제하지 않고 맨 뒤로 정렬됩니다)
+    loaded_data["timestamp"] = loaded_data["timestamp"].astype(TIMESTAMP_DTYPE)
+    loaded_data = loaded_data.set_index("timestamp").sort_index()
+
+    write_parquet_cache(loaded_data, parquet_path)
+    sweep_parquet_cache(keep_path=parquet_path)
+    return loaded_data
+
+
+def describe_columns(dataframe: pd.DataFrame) -> str:
+    """
+    프롬프트에 넣을 컬럼 목록(컬럼 이름과 데이터 타입)을 만드는 함수입니다.
+
+    Args:
+        dataframe (pd.DataFrame): 컬럼 목록을 만들 데이터프레임
+
+    Returns:
+        str: `- 컬럼명 (타입)` 형식의 컬럼 목록
+    """
+    return "\n".join(
+        f"- {column} ({dtype})" for column, dtype in dataframe.dtypes.items()
+    )
+
+
 # 에이전트 생성 함수
 def create_agent(dataframe, selected_model="gpt-4o"):
     """
@@ -175,8 +442,14 @@ def create_agent(dataframe, selected_model="gpt-4o"):
     Returns:
         Agent: 생성된 데이터프레임 에이전트
     """
-    return create_pandas_dataframe_agent(
-        ChatOpenAI(model=selected_model, temperature=0),
+    from langchain_experimental.agents.agent_toolkits import (
+        create_pandas_dataframe_agent,
+    )
+    from langchain_openai import ChatOpenAI
+    from utility.python_repl import TypedErrorPythonAstREPLTool
+
+    agent = create_pandas_dataframe_agent(
+        ChatOpenAI(model=selected_model, temperature=0, streaming=True),
         dataframe,
         verbose=False,
         agent_type="tool-calling",
@@ -184,8 +457,8 @@ def create_agent(dataframe, selected_model="gpt-4o"):
         prefix="You are a professional data analyst and expert in Pandas. "
         "You must use Pandas DataFrame(`df`) to answer user's request. "
         "\n\n[IMPORTANT] DO NOT create or overwrite the `df` variable in your code. "
-        "\n\n[IMPORTANT] The DataFrame already has 'timestamp' as its index in datetime format, "
-        "so you don't need to convert or set it as index again. "
+        "\n\n[IMPORTANT] The DataFrame already has 'timestamp' as its index (DatetimeIndex in UTC, sorted ascending), "
+        "so you don't need to convert, set or sort it again. "
         "You can directly use df.resample() without additional timestamp conversion."
         "\n\nIf you are willing to generate visualization code, please use `plt.show()` at the end of your code. "
         "I prefer seaborn code for visualization, but you can use matplotlib as well."
@@ -195,9 +468,101 @@ def create_agent(dataframe, selected_model="gpt-4o"):
         "\nRecommend to set cmap, palette parameter for seaborn plot if it is applicable. "
         "The language of final answer should be written in Korean. "
         "\n\n###\n\n<Column Guidelines>\n"
-        "If user asks with columns that are not listed in `df.columns`, you may refer to the most similar columns listed below.\n",
+        "If user asks with columns that are not listed in `df.columns`, you may refer to the most similar columns listed below.\n"
+        + describe_columns(dataframe),
     )
 
+    # 실행 오류를 ToolException 객체로 받을 수 있도록 기본 파이썬 도구를 교체합니다
+    agent.tools = [
+        (
+            TypedErrorPythonAstREPLTool(globals=tool.globals, locals=tool.locals)
+            if tool.name == "python_repl_ast"
+            else tool
+        )
+        for tool in agent.tools
+    ]
+    return agent
+
+
+AGENT_CACHE_MAX_ENTRIES = 16  # 프로세스에 보관할 최대 에이전트 수
+
+
+# 에이전트는 재실행 시 다시 만들지 않도록 캐싱합니다
+# (`_dataframe` 인자는 해싱하지 않고 `df_key`로 캐시를 구분하며,
+#  REPL 변수가 다른 사용자와 공유되지 않도록 `session_id`별로 따로 생성합니다)
+@st.cache_resource(show_spinner=False, max_entries=AGENT_CACHE_MAX_ENTRIES)
+def get_agent(
+    selected_model: str, df_key: str, session_id: str, _dataframe: pd.DataFrame
+):
+    """
+    캐싱된 데이터프레임 에이전트를 반환하는 함수입니다.
+
+    Args:
+        selected_model (str): 사용할 OpenAI 모델
+        df_key (str): 데이터프레임을 구분하는 키 (업로드 파일의 해시값)
+        session_id (str): 에이전트를 사용할 세션의 ID
+        _dataframe (pd.DataFrame): 분석할 데이터프레임
+
+    Returns:
+        Agent: 생성된 데이터프레임 에이전트
+    """
+    # load_csv(st.cache_data)는 호출마다 새 복사본을 반환하므로 그대로 전달합니다
+    return create_agent(_dataframe, selected_model)
+
+
+STREAM_FLUSH_INTERVAL = 0.1  # 스트리밍 응답을 화면에 반영하는 최소 간격(초)
+
+
+class AnswerStreamHandler(BaseCallbackHandler):
+    """
+    LLM이 생성하는 토큰을 받는 대로 화면에 출력하는 콜백 핸들러입니다.
+
+    AgentExecutor.stream은 최종 답변을 완성된 상태로 한 번만 전달하므로,
+    최종 답변의 토큰은 LLM 콜백(on_llm_new_token)에서 직접 받아 출력합니다.
+    """
+
+    def __init__(self):
+        self.container = None  # 첫 토큰이 도착했을 때 도구 출력 아래에 생성합니다
+        self.text = ""
+        self.last_flush = 0.0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs) -> None:
+        """
+        새 LLM 호출이 시작되면 이전 호출에서 출력한 중간 텍스트를 지웁니다.
+        (도구 호출 전에 출력된 텍스트가 최종 답변에 섞이지 않도록 합니다)
+        """
+        if self.container is not None:
+            self.container.empty()
+        self.container = None
+        self.text = ""
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        """
+        새 토큰을 받아 지금까지의 텍스트를 출력합니다.
+        도구 호출 토큰처럼 텍스트가 없는 토큰은 무시하고,
+        잦은 화면 갱신을 막기 위해 STREAM_FLUSH_INTERVAL 간격으로 모아서 출력합니다.
+        """
+        if not token:
+            return
+        if self.container is None:
+            self.container = st.empty()
+        self.text += token
+        now = time.monotonic()
+        if now - self.last_flush >= STREAM_FLUSH_INTERVAL:
+            self.container.markdown(self.text + "▌")
+            self.last_flush = now
+
+    def finish(self, answer: str) -> None:
+        """
+        스트리밍이 끝나면 최종 답변으로 화면을 갱신합니다.
+
+        Args:
+            answer (str): 에이전트의 최종 답변
+        """
+        if self.container is None:
+            self.container = st.empty()
+        self.container.markdown(answer)
+
 
 # 질문 처리 함수
 def ask(query):
@@ -212,7 +577,8 @@ def ask(query):
         add_message(MessageRole.USER, [MessageType.TEXT, query])
 
         agent = st.session_state["agent"]
-        response = agent.stream({"input": query})
+        answer_handler = AnswerStreamHandler()
+        response = agent.stream({"input": query}, {"callbacks": [answer_handler]})
 
         ai_answer = ""
         parser_callback = AgentCallbacks(
@@ -221,39 +587,54 @@ def ask(query):
         stream_parser = AgentStreamParser(parser_callback)
 
         with st.chat_message("assistant"):
+            # 답변 토큰은 answer_handler가 실시간으로 출력합니다
             for step in response:
                 stream_parser.process_agent_steps(step)
                 if "output" in step:
                     ai_answer += step["output"]
-            st.write(ai_answer)
+            answer_handler.finish(ai_answer)
 
         add_message(MessageRole.ASSISTANT, [MessageType.TEXT, ai_answer])
 
 
 # 메인 로직
 if clear_btn:
-    st.session_state["messa ges"] = []  # 대화 내용 초기화
+    st.session_state["messages"] = []  # 대화 내용 초기화
+    st.session_state.pop("messa ges", None)  # 이전에 잘못 저장된 키 정리
 
 if apply_btn and uploaded_file:
-    # CSV 파일 로드 시 timestamp 컬럼을 datetime으로 파싱
-    loaded_data = pd.read_csv(
-        uploaded_file,
-        sep=";",
-        parse_dates=["timestamp"],  # timestamp 컬럼을 datetime으로 파싱
-        date_parser=lambda x: pd.to_datetime(x, utc=True),  # UTC 시간대 처리
-    )
+    # 업로드 파일은 bytes로 한 번만 읽고, 이후 모든 파싱은 io.BytesIO(raw)로 처리합니다
+    raw = uploaded_file.getvalue()
+    df_key = hashlib.md5(raw).hexdigest()
+
+    # 샘플로 추론한 데이터 타입은 파일별로 세션에 저장하여 재사용합니다
+    # (세션에는 파일 내용 대신 해시값만 저장합니다)
+    # (청크 단위로 읽는 대용량 파일에만 사용하며,
+    #  Parquet 캐시가 있으면 CSV를 파싱하지 않으므로 타입 추론도 생략합니다)
+    if st.session_state.get("df_key") != df_key:
+        if len(raw) < LARGE_CSV_BYTES or os.path.exists(get_parquet_path(df_key)):
+            st.session_state["csv_dtypes"] = None
+        else:
+            st.session_state["csv_dtypes"] = infer_csv_dtypes(raw)
+        st.session_state["df_key"] = df_key
+    loaded_data = load_csv(raw, df_key, st.session_state["csv_dtypes"])
+    touch_parquet_cache(df_key)
 
     # 데이터프레임 정보 출력 (디버깅용)
     st.write("데이터프레임 정보:")
     st.write(f"컬럼 목록: {loaded_data.columns.tolist()}")
     st.write(f"데이터 타입:\n{loaded_data.dtypes}")
-    st.write("timestamp 샘플:", loaded_data["timestamp"].head())
+    st.write("timestamp 샘플:", loaded_data.index[:5])
+    # (memory_usage_before는 Parquet 캐시에도 함께 저장되어 복원됩니다)
+    st.write(
+        f"메모리 사용량: {loaded_data.attrs['memory_usage_before']:,} bytes → "
+        f"{loaded_data.memory_usage(deep=True).sum():,} bytes"
+    )
 
-    # 세션 상태 저장
-    st.session_state["df"] = loaded_data
-    st.session_state["python_tool"] = PythonAstREPLTool()
-    st.session_state["python_tool"].locals["df"] = loaded_data
-    st.session_state["agent"] = create_agent(loaded_data, selected_model)
+    # 세션 상태 저장 (데이터프레임은 에이전트가 보관하므로 따로 저장하지 않습니다)
+    st.session_state["agent"] = get_agent(
+        selected_model, df_key, st.session_state["session_id"], loaded_data
+    )
     st.success("설정이 완료되었습니다. 대화를 시작해 주세요!")
 elif apply_btn:
     st.warning("파일을 업로드 해주세요.")
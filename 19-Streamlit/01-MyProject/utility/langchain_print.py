@@ -140,6 +140,11 @@ class AgentStreamParser:
                 observation_dict["observation"] = getattr(
                     observation, "observation", None
                 )
+                # 어떤 도구 호출의 결과인지 알 수 있도록 도구 정보도 함께 전달합니다
+                observation_dict["tool"] = getattr(observation.action, "tool", None)
+                observation_dict["tool_input"] = getattr(
+                    observation.action, "tool_input", None
+                )
             self.callbacks.observation_callback(observation_dict)
 
     def _process_result(self, result: str) -> None:
@@ -0,0 +1,99 @@
+"""
+채팅 메시지 저장 및 출력 함수 모음입니다.
+
+Streamlit 페이지가 재실행될 때마다 호출되는 함수들이므로 타입 힌트를 명시하여
+필요한 경우 `mypyc utility/message_store.py`로 컴파일해서 사용할 수 있습니다.
+"""
+
+from typing import Any, List
+import streamlit as st
+
+
+class MessageRole:
+    """
+    메세지 역할 클래스
+    """
+
+    USER: str = "user"
+    ASSISTANT: str = "assistant"
+
+
+class MessageType:
+    """
+    메세지 유형 클래스
+    """
+
+    TEXT: str = "text"  # 텍스트 메세지
+    FIGURE: str = "figure"  # 그림 메세지
+    CODE: str = "code"  # 코드 메세지
+    DATAFRAME: str = "dataframe"  # 데이터프레임 메세지
+
+
+MAX_RENDER_MESSAGES: int = 50  # 화면에 출력할 최근 메시지 수
+
+
+# 메시지 관련 함수
+def merge_text_contents(content_list: List[Any]) -> List[Any]:
+    """
+    연속된 텍스트 메시지를 하나로 합치는 함수입니다.
+    텍스트는 한 번의 `st.markdown` 호출로 출력하고, 그림/코드/데이터프레임은 그대로 둡니다.
+
+    Args:
+        content_list (List[Any]): [MessageType, 메시지 내용] 형태의 메시지 리스트
+
+    Returns:
+        List[Any]: 연속된 텍스트 메시지가 합쳐진 메시지 리스트
+    """
+    merged: List[Any] = []
+    for content in content_list:
+        if (
+            isinstance(content, list)
+            and content[0] == MessageType.TEXT
+            and merged
+            and isinstance(merged[-1], list)
+            and merged[-1][0] == MessageType.TEXT
+        ):
+            merged[-1] = [MessageType.TEXT, f"{merged[-1][1]}\n\n{content[1]}"]
+        else:
+            merged.append(content)
+    return merged
+
+
+def print_messages() -> None:
+    """
+    저장된 메시지를 화면에 출력하는 함수입니다.
+    대화가 길어져도 재실행 비용이 커지지 않도록 최근 메시지만 출력합니다.
+    """
+    for role, content_list in st.session_state["messages"][-MAX_RENDER_MESSAGES:]:
+        with st.chat_message(role):
+            for content in merge_text_contents(content_list):
+                if isinstance(content, list):
+                    message_type, message_content = content
+                    if message_type == MessageType.TEXT:
+                        st.markdown(message_content)  # 텍스트 메시지 출력
+                    elif message_type == MessageType.FIGURE:
+                        st.pyplot(message_content)  # 그림 메시지 출력
+                    elif message_type == MessageType.CODE:
+                        with st.status("코드 출력", expanded=False):
+                            st.code(
+                                message_content, language="python"
+                            )  # 코드 메시지 출력
+                    elif message_type == MessageType.DATAFRAME:
+                        st.dataframe(message_content)  # 데이터프레임 메시지 출력
+                else:
+                    raise ValueError(f"알 수 없는 콘텐츠 유형: {content}")
+
+
+def add_message(role: str, content: List[Any]) -> None:
+    """
+    새로운 메시지를 저장하는 함수입니다.
+
+    Args:
+        role (str): 메시지 역할 (MessageRole.USER 또는 MessageRole.ASSISTANT)
+        content (List[Any]): [MessageType, 메시지 내용] 형태의 메시지
+    """
+    messages = st.session_state["messages"]
+    if messages and messages[-1][0] == role:
+        messages[-1][1].append(content)  # 같은 역할의 연속된 메시지는 하나로 합칩니다
+    else:
+        messages.append([role, [content]])  # 새로운 역할의 메시지는 새로 추가합니다
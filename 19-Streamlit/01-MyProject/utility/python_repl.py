@@ -0,0 +1,134 @@
+import ast
+import sys
+import threading
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from io import StringIO
+from typing import Any, List, Optional
+from langchain_core.callbacks.manager import CallbackManagerForToolRun
+from langchain_core.tools import ToolException
+from langchain_experimental.tools import PythonAstREPLTool
+from langchain_experimental.tools.python.tool import sanitize_input
+
+# pyplot의 Figure 목록은 프로세스 전역이므로, 코드 실행과 Figure 수집을 한 번에 하나씩만 수행합니다
+# (여러 세션이나 병렬 도구 호출이 서로의 Figure를 가져가지 않도록 합니다)
+_FIGURE_LOCK = threading.Lock()
+
+
+@dataclass
+class ReplOutput:
+    """
+    파이썬 코드 실행 결과와 실행 중 생성된 Figure를 함께 담는 데이터 클래스입니다.
+    LLM에는 `str()`로 변환된 실행 결과만 전달됩니다.
+
+    Attributes:
+        output (Any): 마지막 표현식의 결과(또는 표준 출력)
+        figures (List[Any]): 코드 실행 중 새로 생성된 matplotlib Figure 리스트 (이미 닫힌 상태)
+    """
+
+    output: Any
+    figures: List[Any] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return str(self.output)
+
+
+def _open_figure_numbers() -> set:
+    """
+    현재 열려 있는 pyplot Figure 번호를 반환합니다.
+    pyplot을 아직 불러오지 않았다면 열린 Figure도 없으므로 빈 집합을 반환합니다.
+    """
+    plt = sys.modules.get("matplotlib.pyplot")
+    return set(plt.get_fignums()) if plt else set()
+
+
+def _pop_new_figures(figure_numbers: set) -> list:
+    """
+    기록해 둔 번호 이후 새로 생성된 Figure를 pyplot 전역 상태에서 닫고 반환합니다.
+
+    Args:
+        figure_numbers (set): 코드 실행 전에 열려 있던 Figure 번호
+
+    Returns:
+        list: 새로 생성된 matplotlib Figure 리스트
+    """
+    plt = sys.modules.get("matplotlib.pyplot")
+    if plt is None:
+        return []
+
+    figures = [
+        plt.figure(number)
+        for number in plt.get_fignums()
+        if number not in figure_numbers
+    ]
+    for fig in figures:
+        plt.close(fig)
+    return figures
+
+
+class TypedErrorPythonAstREPLTool(PythonAstREPLTool):
+    """
+    코드 실행 중 발생한 오류를 문자열 대신 ToolException 객체로 반환하는 PythonAstREPLTool 입니다.
+
+    기본 PythonAstREPLTool은 오류를 "에러명: 메시지" 문자열로 반환하므로 정상 출력과 구분하려면
+    문자열 검사가 필요합니다. 이 도구는 `isinstance(observation, ToolException)`으로 오류를 구분할 수 있고,
+    LLM에는 기존과 같은 "에러명: 메시지" 문자열로 전달됩니다.
+    코드 실행 중 생성된 Figure가 있으면 실행 결과와 함께 ReplOutput으로 반환합니다.
+    """
+
+    def _run(
+        self,
+        query: str,
+        run_manager: Optional[CallbackManagerForToolRun] = None,
+    ) -> Any:
+        """
+        파이썬 코드를 실행하고 마지막 표현식의 결과(또는 표준 출력)를 반환합니다.
+
+        Args:
+            query (str): 실행할 파이썬 코드
+            run_manager (CallbackManagerForToolRun, optional): 콜백 매니저
+
+        Returns:
+            Any: 실행 결과. 새로 생성된 Figure가 있으면 ReplOutput 객체를,
+                오류가 발생하면 ToolException 객체를 반환합니다.
+        """
+        if self.sanitize_input:
+            query = sanitize_input(query)
+
+        with _FIGURE_LOCK:
+            figure_numbers = _open_figure_numbers()
+            try:
+                output = self._execute(query)
+            except Exception as e:
+                output = ToolException(f"{type(e).__name__}: {e}")
+            # 오류가 발생해도 실행 중 생성된 Figure는 전역 상태에 남지 않도록 닫습니다
+            figures = _pop_new_figures(figure_numbers)
+
+        if figures and not isinstance(output, ToolException):
+            return ReplOutput(output, figures)
+        return output
+
+    def _execute(self, query: str) -> Any:
+        """
+        정리된 파이썬 코드를 실행합니다.
+
+        Args:
+            query (str): 실행할 파이썬 코드
+
+        Returns:
+            Any: 마지막 표현식의 결과(또는 표준 출력)
+        """
+        tree = ast.parse(query)
+        module = ast.Module(tree.body[:-1], type_ignores=[])
+        exec(ast.unparse(module), self.globals, self.locals)
+        module_end_str = ast.unparse(ast.Module(tree.body[-1:], type_ignores=[]))
+        io_buffer = StringIO()
+        try:
+            with redirect_stdout(io_buffer):
+                ret = eval(module_end_str, self.globals, self.locals)
+            return io_buffer.getvalue() if ret is None else ret
+        except Exception:
+            # 마지막 문장이 표현식이 아니면 exec로 실행합니다
+            with redirect_stdout(io_buffer):
+                exec(module_end_str, self.globals, self.locals)
+            return io_buffer.getvalue()